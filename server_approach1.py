@@ -5,8 +5,9 @@ Browser -> Python Backend -> Deepgram -> Python Backend -> Browser
 """
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
 import uvicorn
 import logging
 import asyncio
@@ -21,18 +22,48 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Per-chunk/per-message relay logs use their own logger with a bare formatter.
+# It is quiet by default; set CHUNK_LOG_LEVEL=DEBUG to trace the relay.
+chunk_logger = logging.getLogger(f"{__name__}.chunks")
+chunk_logger.setLevel(os.getenv("CHUNK_LOG_LEVEL", "WARNING").upper())
+chunk_handler = logging.StreamHandler()
+chunk_handler.setFormatter(logging.Formatter("%(message)s"))
+chunk_logger.addHandler(chunk_handler)
+chunk_logger.propagate = False
+
 # Get Deepgram API key
 DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
 if not DEEPGRAM_API_KEY:
     raise ValueError("DEEPGRAM_API_KEY not found in environment variables")
 
+# Upper bound for audio coalesced into a single WebSocket frame (bounds first-audio latency)
+MAX_COALESCE_BYTES = 16384
+# Per-connection coalescing buffer size, allocated once per session
+AUDIO_BUFFER_SIZE = 65536
+# Max audio chunks buffered per session before Deepgram reads are paused
+AUDIO_QUEUE_MAXSIZE = 64
+# Browser text is batched until this long passes without a new message...
+TEXT_DEBOUNCE_SECONDS = 0.05
+# ...or until this much text is waiting
+TEXT_BATCH_MAX_CHARS = 200
+
+# Shared Deepgram client; each session opens its own websocket from it
+deepgram = DeepgramClient(DEEPGRAM_API_KEY)
+
+# Landing page is read once at import; responses are built per request
+with open("index.html", "rb") as f:
+    INDEX_HTML = f.read()
+
 app = FastAPI()
+# Compress the landing page; WebSocket traffic is not affected
+app.add_middleware(GZipMiddleware, minimum_size=500)
 
 
 @app.get("/")
 async def get():
     """Serve the main HTML file"""
-    return FileResponse("index.html")
+    # Response headers are mutable (middleware edits them), so never share an instance
+    return HTMLResponse(INDEX_HTML, headers={"Cache-Control": "public, max-age=3600"})
 
 
 @app.websocket("/ws")
@@ -48,54 +79,85 @@ async def websocket_endpoint(websocket: WebSocket):
     logger.info("Client connected")
 
     dg_connection = None
-    audio_queue = asyncio.Queue()
+    audio_queue = asyncio.Queue(maxsize=AUDIO_QUEUE_MAXSIZE)
     is_connected = True
+    sender_task = None
+    receive_task = None
 
     async def audio_sender():
-        """Background task to send audio chunks to browser"""
+        """Background task to send audio chunks to browser (exits on a None sentinel)"""
+        buf = bytearray(AUDIO_BUFFER_SIZE)  # preallocated, reused for the whole session
+        view = memoryview(buf)
+        pending = None  # chunk that did not fit in the remaining buffer space
         try:
-            while is_connected:
-                try:
-                    data = await asyncio.wait_for(audio_queue.get(), timeout=0.1)
+            stopping = False
+            while not stopping:
+                if pending is not None:
+                    data, pending = pending, None
+                else:
+                    data = await audio_queue.get()
+                if data is None:
+                    break
+
+                # Single or oversized chunk: pass Deepgram's bytes through untouched
+                if audio_queue.empty() or len(data) >= MAX_COALESCE_BYTES:
                     await websocket.send_bytes(data)
-                    logger.debug(f"Sent {len(data)} bytes to browser")
-                except asyncio.TimeoutError:
+                    chunk_logger.debug("Sent %d bytes to browser", len(data))
                     continue
-                except Exception as e:
-                    logger.error(f"Error in audio_sender: {e}")
-                    break
+
+                # Merge chunks that are already waiting into one frame
+                n = len(data)
+                view[:n] = data
+                while not audio_queue.empty() and n < MAX_COALESCE_BYTES:
+                    chunk = audio_queue.get_nowait()
+                    if chunk is None:
+                        stopping = True
+                        break
+                    if n + len(chunk) > AUDIO_BUFFER_SIZE:
+                        pending = chunk
+                        break
+                    view[n:n + len(chunk)] = chunk
+                    n += len(chunk)
+
+                # ASGI needs bytes, and the server may still hold the frame after
+                # send_bytes returns; copy it out before the buffer is reused
+                await websocket.send_bytes(bytes(view[:n]))
+                chunk_logger.debug("Sent %d bytes to browser", n)
         except Exception as e:
-            logger.error(f"Audio sender task error: {e}")
+            logger.error("Audio sender task error: %s", e)
 
     try:
-        # Initialize Deepgram client (SDK 5.0+ reads API key from environment)
-        deepgram = DeepgramClient()
-        dg_connection = deepgram.speak.websocket.v("1")
+        # Async client: event handlers run on this event loop, not an SDK thread
+        dg_connection = deepgram.speak.asyncwebsocket.v("1")
 
         # Event handlers for Deepgram connection
-        def on_open(self, open_event, **kwargs):
+        async def on_open(self, open_event, **kwargs):
             logger.info("Deepgram connection opened")
 
-        def on_binary_data(self, data, **kwargs):
+        async def on_binary_data(self, data, **kwargs):
             """Receive audio chunks from Deepgram and queue them for sending"""
+            # Called on this event loop by the async client, so the queue can be
+            # used directly without call_soon_threadsafe. The SDK still wraps each
+            # call in its own Task (AsyncSpeakWSClient._emit uses create_task + gather)
             if is_connected:
                 try:
-                    # Put audio data in queue (non-blocking)
-                    audio_queue.put_nowait(data)
+                    # Waits while the queue is full, so a slow browser backpressures
+                    # the Deepgram stream instead of growing memory
+                    await audio_queue.put(data)
                 except Exception as e:
-                    logger.error(f"Error queuing audio: {e}")
+                    logger.error("Error queuing audio: %s", e)
 
-        def on_metadata(self, metadata, **kwargs):
-            logger.info(f"Deepgram metadata: {metadata}")
+        async def on_metadata(self, metadata, **kwargs):
+            logger.info("Deepgram metadata: %s", metadata)
 
-        def on_flush(self, flushed, **kwargs):
-            logger.info("Deepgram flush event received")
+        async def on_flush(self, flushed, **kwargs):
+            chunk_logger.debug("Deepgram flush event received")
 
-        def on_close(self, close_event, **kwargs):
+        async def on_close(self, close_event, **kwargs):
             logger.info("Deepgram connection closed")
 
-        def on_error(self, error, **kwargs):
-            logger.error(f"Deepgram error: {error}")
+        async def on_error(self, error, **kwargs):
+            logger.error("Deepgram error: %s", error)
 
         # Register event handlers
         dg_connection.on(SpeakWebSocketEvents.Open, on_open)
@@ -113,7 +175,7 @@ async def websocket_endpoint(websocket: WebSocket):
         )
 
         # Start Deepgram connection
-        if not dg_connection.start(options):
+        if not await dg_connection.start(options):
             logger.error("Failed to start Deepgram connection")
             await websocket.close()
             return
@@ -123,35 +185,74 @@ async def websocket_endpoint(websocket: WebSocket):
         # Start background audio sender task
         sender_task = asyncio.create_task(audio_sender())
 
-        # Wait for text messages from browser
+        # Wait for text messages from browser, batching bursts into one flush
+        pending_text = []
+        pending_chars = 0
         while True:
-            data = await websocket.receive_text()
-            logger.info(f"Received text from client: {data}")
+            if receive_task is None:
+                receive_task = asyncio.create_task(websocket.receive_text())
 
-            # Send text to Deepgram for TTS
-            dg_connection.send_text(data)
-            logger.info("Text sent to Deepgram")
+            # Only time out while there is text waiting to be flushed
+            timeout = TEXT_DEBOUNCE_SECONDS if pending_text else None
+            done, _ = await asyncio.wait({receive_task}, timeout=timeout)
+
+            if receive_task in done:
+                data = receive_task.result()
+                receive_task = None
+                chunk_logger.debug("Received text from client: %s", data)
+                pending_text.append(data)
+                pending_chars += len(data)
+                if pending_chars < TEXT_BATCH_MAX_CHARS:
+                    continue
+
+            # Debounce window elapsed (or batch is large enough): send text to Deepgram
+            # The browser trims each message, so separate them with a space
+            await dg_connection.send_text(" ".join(pending_text))
+            chunk_logger.debug("Text sent to Deepgram")
+            pending_text.clear()
+            pending_chars = 0
 
             # Flush to ensure all audio is sent
-            dg_connection.flush()
+            await dg_connection.flush()
 
     except WebSocketDisconnect:
         logger.info("Client disconnected")
         is_connected = False
     except Exception as e:
-        logger.error(f"Error in websocket_endpoint: {e}")
+        logger.error("Error in websocket_endpoint: %s", e)
         is_connected = False
     finally:
         is_connected = False
+        # Wake the sender so it exits, then make sure it is gone
+        try:
+            audio_queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+        if sender_task:
+            sender_task.cancel()
+        if receive_task:
+            receive_task.cancel()
         # Clean up Deepgram connection
         if dg_connection:
             try:
-                dg_connection.finish()
+                await dg_connection.finish()
                 logger.info("Deepgram connection closed")
             except Exception as e:
-                logger.error(f"Error closing Deepgram connection: {e}")
+                logger.error("Error closing Deepgram connection: %s", e)
 
 
 if __name__ == "__main__":
     logger.info("Starting server on http://localhost:8000")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # workers > 1 requires the app to be passed as an import string
+    uvicorn.run(
+        "server_approach1:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        ws_per_message_deflate=False,  # PCM audio doesn't compress; skip zlib per frame
+        ws_ping_interval=20,  # Ping idle browsers so dead sessions raise WebSocketDisconnect
+        ws_ping_timeout=20,
+    )
@@ -5,12 +5,17 @@ Browser connects directly to Deepgram for TTS.
 Browser -> Python Backend (token only) -> Browser -> Deepgram (direct audio)
 """
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import uvicorn
+import httpx
 import logging
+import time
 import os
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -25,49 +30,134 @@ DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
 if not DEEPGRAM_API_KEY:
     raise ValueError("DEEPGRAM_API_KEY not found in environment variables")
 
-app = FastAPI()
+# Project the short-lived browser keys are created in
+DEEPGRAM_PROJECT_ID = os.getenv("DEEPGRAM_PROJECT_ID")
+if not DEEPGRAM_PROJECT_ID:
+    raise ValueError("DEEPGRAM_PROJECT_ID not found in environment variables")
+
+# Lifetime of the scoped keys handed to browsers
+TOKEN_TTL_SECONDS = 60
+
+# Origins allowed to call the API, comma-separated (spaces around commas are fine)
+FRONTEND_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("FRONTEND_ORIGIN", "http://localhost:8001").split(",")
+    if origin.strip()
+]
+
+# Read the page once; each GET / wraps the cached bytes in a fresh response
+with open("index_approach2.html", "rb") as f:
+    INDEX_HTML = f.read()
+
+# Per-IP token bucket for /api/token: bursts of 5, refilled at 5 per minute.
+# Buckets live in each worker process, so the effective limit is
+# 5 x WEB_CONCURRENCY per minute per IP.
+RATE_LIMIT_BURST = 5
+RATE_LIMIT_PER_SECOND = RATE_LIMIT_BURST / 60
+RATE_LIMIT_MAX_CLIENTS = 10000
+rate_buckets = OrderedDict()  # client IP -> (tokens, last update), least recent first
+
+@asynccontextmanager
+async def lifespan(app):
+    """Own the pooled HTTP/2 client used for Deepgram Manage API calls"""
+    app.state.http = httpx.AsyncClient(
+        base_url="https://api.deepgram.com",
+        headers={"Authorization": f"Token {DEEPGRAM_API_KEY}"},
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+
 
-# Add CORS middleware to allow browser requests
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# Add CORS middleware to allow browser requests from the frontend origin(s)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, specify your domain
+    allow_origins=FRONTEND_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET"],
+    allow_headers=["authorization", "content-type"],
+    max_age=86400,  # Let browsers cache preflight results for a day
 )
 
+# Compress HTML/JSON responses larger than 500 bytes
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
 
 @app.get("/")
 async def get():
     """Serve the main HTML file"""
-    return FileResponse("index_approach2.html")
+    return HTMLResponse(INDEX_HTML, headers={"Cache-Control": "public, max-age=3600"})
+
+
+def allow_request(client_ip):
+    """
+    Take one token from the client's bucket; returns False when it is empty.
+
+    Allows 5 requests per minute per IP in each worker process, i.e.
+    5 x WEB_CONCURRENCY per minute for the whole server. The pages reuse a
+    key until 10 s before it expires (about one fetch per 50 s), so this
+    leaves room for reloads and a few tabs without limiting Speak clicks.
+
+    At most RATE_LIMIT_MAX_CLIENTS buckets are kept; the least recently seen
+    IP is evicted first, so every call is O(1).
+    """
+    now = time.monotonic()
+    tokens, last = rate_buckets.pop(client_ip, (RATE_LIMIT_BURST, now))
+    tokens = min(RATE_LIMIT_BURST, tokens + (now - last) * RATE_LIMIT_PER_SECOND)
+    allowed = tokens >= 1
+    rate_buckets[client_ip] = (tokens - 1 if allowed else tokens, now)
+    if len(rate_buckets) > RATE_LIMIT_MAX_CLIENTS:
+        rate_buckets.popitem(last=False)
+    return allowed
+
+
+async def create_scoped_key():
+    """Create a Deepgram key limited to usage:write that expires after TOKEN_TTL_SECONDS"""
+    response = await app.state.http.post(
+        f"/v1/projects/{DEEPGRAM_PROJECT_ID}/keys",
+        json={
+            "comment": "Short-lived browser TTS key",
+            "scopes": ["usage:write"],
+            "time_to_live_in_seconds": TOKEN_TTL_SECONDS,
+        },
+    )
+    response.raise_for_status()
+    return response.json()["key"]
 
 
 @app.get("/api/token")
-async def get_token():
+async def get_token(request: Request):
     """
-    Endpoint to provide Deepgram API token to the browser.
+    Endpoint to provide a short-lived Deepgram key to the browser.
+
+    The master API key never leaves the server. Every request gets its own
+    scoped key minted via Deepgram's Manage API, so keys are never shared
+    between clients.
 
-    In production, you should:
-    1. Use Deepgram's temporary key creation API
-    2. Set expiration time on the key
-    3. Implement rate limiting
-    4. Add authentication/authorization
+    Requests are rate limited to 5 per minute per client IP and worker
+    (see allow_request).
+
+    In production, you should also add authentication/authorization.
     """
-    try:
-        logger.info("Token requested by client")
+    client_ip = request.client.host if request.client else "unknown"
+    logger.info("Token requested by client %s", client_ip)
 
-        # For demo purposes, we're sending the main API key
-        # In production, create a temporary key with limited permissions
-        response = {
-            "token": DEEPGRAM_API_KEY,
-            "message": "Token retrieved successfully"
-        }
+    if not allow_request(client_ip):
+        logger.warning("Rate limit exceeded for %s", client_ip)
+        raise HTTPException(status_code=429, detail="Too many token requests")
 
-        return JSONResponse(content=response)
+    try:
+        token = await create_scoped_key()
+        logger.info("Issued scoped Deepgram key to %s", client_ip)
+        return {"token": token, "expires_in": TOKEN_TTL_SECONDS}
 
-    except Exception as e:
-        logger.error(f"Error providing token: {e}")
+    except (httpx.HTTPError, KeyError, ValueError) as e:
+        logger.error("Error providing token: %s", e)
         raise HTTPException(status_code=500, detail="Failed to retrieve token")
 
 
@@ -79,4 +169,12 @@ async def health_check():
 
 if __name__ == "__main__":
     logger.info("Starting Approach #2 server on http://localhost:8001")
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    # workers > 1 requires the app to be passed as an import string
+    uvicorn.run(
+        "server_approach2:app",
+        host="0.0.0.0",
+        port=8001,
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="uvloop",
+        http="httptools",
+    )
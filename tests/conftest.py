@@ -0,0 +1,20 @@
+"""Shared fixtures for importing the servers under test."""
+
+import importlib
+import os
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def load_server(monkeypatch):
+    """Import a server module with placeholder settings, from the repo root"""
+    # Both servers validate their settings and read the HTML relative to cwd at import
+    monkeypatch.setenv("DEEPGRAM_API_KEY", os.getenv("DEEPGRAM_API_KEY", "test-key"))
+    monkeypatch.setenv("DEEPGRAM_PROJECT_ID", os.getenv("DEEPGRAM_PROJECT_ID", "test-project"))
+    monkeypatch.chdir(REPO_ROOT)
+    monkeypatch.syspath_prepend(str(REPO_ROOT))
+    return importlib.import_module
@@ -0,0 +1,28 @@
+"""Regression checks for the landing page served by both servers."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import REPO_ROOT
+
+
+@pytest.fixture(params=[
+    ("server_approach1", "index.html"),
+    ("server_approach2", "index_approach2.html"),
+])
+def server(request, load_server):
+    module_name, html_file = request.param
+    return load_server(module_name), (REPO_ROOT / html_file).read_bytes()
+
+
+@pytest.mark.parametrize("accept_encoding", ["gzip", "identity"])
+def test_index_survives_repeated_requests(server, accept_encoding):
+    """GZipMiddleware must not leave a previous response's headers on the next one"""
+    module, html = server
+    client = TestClient(module.app)
+
+    for _ in range(2):
+        response = client.get("/", headers={"Accept-Encoding": accept_encoding})
+        assert response.status_code == 200
+        assert response.content == html
+        assert response.headers["cache-control"] == "public, max-age=3600"
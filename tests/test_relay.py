@@ -0,0 +1,68 @@
+"""Checks for the approach 1 audio relay, with Deepgram replaced by a fake."""
+
+from types import SimpleNamespace
+
+import pytest
+from deepgram import SpeakWebSocketEvents
+from fastapi.testclient import TestClient
+
+CHUNK_COUNT = 200
+CHUNK_SIZE = 1000
+
+
+class FakeSpeakConnection:
+    """Stands in for AsyncSpeakWSClient; flush() emits numbered audio chunks"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.handlers = {}
+        self.texts = []
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    async def start(self, options):
+        return True
+
+    async def send_text(self, text):
+        self.texts.append(text)
+        return True
+
+    async def flush(self):
+        on_binary_data = self.handlers[SpeakWebSocketEvents.AudioData]
+        for chunk in self.chunks:
+            await on_binary_data(self, data=chunk)
+        return True
+
+    async def finish(self):
+        return True
+
+
+@pytest.fixture
+def relay(load_server, monkeypatch):
+    module = load_server("server_approach1")
+    chunks = [i.to_bytes(2, "big") * (CHUNK_SIZE // 2) for i in range(CHUNK_COUNT)]
+    connection = FakeSpeakConnection(chunks)
+    fake_client = SimpleNamespace(
+        speak=SimpleNamespace(asyncwebsocket=SimpleNamespace(v=lambda version: connection))
+    )
+    monkeypatch.setattr(module, "deepgram", fake_client)
+    return module, connection
+
+
+def test_relay_preserves_audio_order_when_coalescing(relay):
+    """Merged frames are bytes and carry the chunks in order, unaltered"""
+    module, connection = relay
+    expected = b"".join(connection.chunks)
+
+    frames = []
+    with TestClient(module.app).websocket_connect("/ws") as ws:
+        ws.send_text("Hello there")
+        while sum(len(frame) for frame in frames) < len(expected):
+            frames.append(ws.receive_bytes())
+
+    assert connection.texts == ["Hello there"]
+    assert all(type(frame) is bytes for frame in frames)
+    assert len(frames) < CHUNK_COUNT  # chunks were actually coalesced
+    assert max(len(frame) for frame in frames) <= module.MAX_COALESCE_BYTES + CHUNK_SIZE
+    assert b"".join(frames) == expected
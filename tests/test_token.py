@@ -0,0 +1,119 @@
+"""Checks for the approach 2 token endpoint, with the Manage API mocked out."""
+
+import itertools
+import json
+from collections import OrderedDict
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+
+class FakeManageApi:
+    """Records key-creation calls and answers with numbered keys (or a canned reply)"""
+
+    def __init__(self):
+        self.requests = []
+        self.reply = None
+        self._key_ids = itertools.count()
+
+    def __call__(self, request):
+        self.requests.append(request)
+        if self.reply is not None:
+            return self.reply
+        return httpx.Response(200, json={"key": f"scoped-key-{next(self._key_ids)}"})
+
+
+@pytest.fixture
+def token_server(load_server, monkeypatch):
+    """server_approach2 with a fresh rate limiter and a mocked Deepgram HTTP client"""
+    module = load_server("server_approach2")
+    monkeypatch.setattr(module, "rate_buckets", OrderedDict())
+
+    manage_api = FakeManageApi()
+    module.app.state.http = httpx.AsyncClient(
+        base_url="https://api.deepgram.com",
+        headers={"Authorization": f"Token {module.DEEPGRAM_API_KEY}"},
+        transport=httpx.MockTransport(manage_api),
+    )
+    return module, manage_api
+
+
+def client_for(module, ip):
+    return TestClient(module.app, client=(ip, 50000))
+
+
+def test_token_mints_scoped_short_lived_key(token_server):
+    module, manage_api = token_server
+
+    response = client_for(module, "10.0.0.1").get("/api/token")
+
+    assert response.status_code == 200
+    assert response.json() == {"token": "scoped-key-0", "expires_in": module.TOKEN_TTL_SECONDS}
+
+    (request,) = manage_api.requests
+    assert request.method == "POST"
+    assert request.url.path == f"/v1/projects/{module.DEEPGRAM_PROJECT_ID}/keys"
+    assert request.headers["authorization"] == f"Token {module.DEEPGRAM_API_KEY}"
+    body = json.loads(request.content)
+    assert body["scopes"] == ["usage:write"]
+    assert body["time_to_live_in_seconds"] == module.TOKEN_TTL_SECONDS
+
+
+def test_token_is_not_shared_between_requests(token_server):
+    module, _ = token_server
+
+    first = client_for(module, "10.0.0.1").get("/api/token").json()["token"]
+    second = client_for(module, "10.0.0.2").get("/api/token").json()["token"]
+
+    assert first != second
+
+
+@pytest.mark.parametrize("reply", [
+    httpx.Response(403, json={"err_msg": "Insufficient permissions"}),
+    httpx.Response(200, content=b"<html>not json</html>"),
+    httpx.Response(200, json={"unexpected": "shape"}),
+])
+def test_token_upstream_failure_returns_500(token_server, reply):
+    module, manage_api = token_server
+    manage_api.reply = reply
+
+    response = client_for(module, "10.0.0.1").get("/api/token")
+
+    assert response.status_code == 500
+    assert response.json() == {"detail": "Failed to retrieve token"}
+
+
+def test_token_rate_limited_after_burst(token_server):
+    module, manage_api = token_server
+    client = client_for(module, "10.0.0.1")
+
+    statuses = [client.get("/api/token").status_code for _ in range(module.RATE_LIMIT_BURST + 1)]
+
+    assert statuses == [200] * module.RATE_LIMIT_BURST + [429]
+    # The rejected request never reached the Manage API
+    assert len(manage_api.requests) == module.RATE_LIMIT_BURST
+    # Other clients have their own bucket
+    assert client_for(module, "10.0.0.2").get("/api/token").status_code == 200
+
+
+def test_rate_limiter_evicts_least_recently_seen_ip(token_server, monkeypatch):
+    module, _ = token_server
+    monkeypatch.setattr(module, "RATE_LIMIT_MAX_CLIENTS", 2)
+
+    for _ in range(module.RATE_LIMIT_BURST):
+        assert module.allow_request("drained")
+    assert not module.allow_request("drained")
+
+    module.allow_request("other")
+    module.allow_request("drained")  # refused again, but marks "drained" as recently seen
+    module.allow_request("newcomer")  # evicts "other", the least recently seen
+
+    assert list(module.rate_buckets) == ["drained", "newcomer"]
+    assert not module.allow_request("drained")
+
+    module.allow_request("another")  # evicts "newcomer"
+    module.allow_request("last")  # evicts "drained", so its bucket starts full again
+    assert "drained" not in module.rate_buckets
+    assert len(module.rate_buckets) == 2
+    assert module.allow_request("drained")